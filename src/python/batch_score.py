@@ -0,0 +1,299 @@
+"""Offline multi-process sentiment / risk scoring for JSONL corpora.
+
+    python batch_score.py corpus.jsonl scores.jsonl --workers 8
+    python batch_score.py corpus.jsonl scores.parquet --format parquet --resume
+
+Each input line is either an ``AnalysisRequest`` object (``context`` +
+``data``) or a single item ``{"type": "sentiment", "content": "..."}`` with
+an optional ``id``. The file is split into byte-range shards that are scored
+by a process pool. Each worker loads the models once and runs with its own
+share of the CPU threads.
+
+Every shard appends to its own part file and checkpoints the input offset it
+has reached after each chunk. After a crash, ``--resume`` picks every shard
+up from its last checkpoint instead of starting over. Output records are
+keyed by the byte offset of their input line.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+_engine = None
+_loop = None
+_load_seconds = 0.0
+
+
+def _init_worker(threads, chunk_size):
+    # Configure the engine before it is imported so each worker keeps to its
+    # share of the cores and loads only what it needs. A worker is its own
+    # only client, so the serving backpressure limits are sized to a chunk.
+    global _engine, _loop, _load_seconds
+    os.environ.update(
+        MODEL_LOAD_MODE="lazy",
+        INFERENCE_WORKERS="1",
+        INFERENCE_MAX_PENDING=str(chunk_size * 4),
+        SENTIMENT_MAX_QUEUE=str(chunk_size * 16),
+        ASPECT_MAX_QUEUE="0",
+        TORCH_NUM_THREADS=str(threads)
+    )
+    started = time.perf_counter()
+    import ai_engine
+
+    _engine = ai_engine.ai_engine
+    _engine.models.get("sentiment")
+    _engine.models.get("aspect")
+    _loop = asyncio.new_event_loop()
+    _load_seconds = time.perf_counter() - started
+
+
+def _to_request(record):
+    from ai_engine import AnalysisRequest
+
+    if "data" in record:
+        return AnalysisRequest(**record)
+    return AnalysisRequest(
+        context=record.get("context", {}),
+        data=[{"type": record.get("type", "sentiment"), "content": record["content"]}]
+    )
+
+
+async def _score_requests(requests):
+    async def score(request):
+        if isinstance(request, Exception):
+            return request
+        return await _engine.analyze_items(request.data, request.context)
+
+    return await asyncio.gather(*(score(request) for request in requests), return_exceptions=True)
+
+
+def _read_checkpoint(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def _write_checkpoint(path, checkpoint):
+    with open(f"{path}.tmp", "w") as handle:
+        json.dump(checkpoint, handle)
+    os.replace(f"{path}.tmp", path)
+
+
+def score_shard(input_path, start, end, part_path, chunk_size):
+    """Score input bytes [start, end) into ``part_path``, resuming from its checkpoint."""
+    checkpoint_path = f"{part_path}.ckpt"
+    checkpoint = _read_checkpoint(checkpoint_path) or {"offset": start, "output_bytes": 0, "docs": 0, "errors": 0}
+    timings = {"read": 0.0, "parse": 0.0, "inference": 0.0, "write": 0.0}
+    docs_before = checkpoint["docs"]
+    started = time.perf_counter()
+
+    with open(input_path, "rb") as source, open(part_path, "ab") as sink:
+        # Drop anything written after the last checkpoint before a crash
+        sink.truncate(checkpoint["output_bytes"])
+        sink.seek(checkpoint["output_bytes"])
+        source.seek(checkpoint["offset"])
+        offset = checkpoint["offset"]
+
+        while offset < end:
+            stage = time.perf_counter()
+            lines = []
+            while offset < end and len(lines) < chunk_size:
+                line = source.readline()
+                if not line:
+                    offset = end
+                    break
+                if line.strip():
+                    lines.append((offset, line))
+                offset += len(line)
+            timings["read"] += time.perf_counter() - stage
+
+            stage = time.perf_counter()
+            requests = []
+            for _, line in lines:
+                try:
+                    requests.append(_to_request(json.loads(line)))
+                except Exception as e:
+                    requests.append(e)
+            timings["parse"] += time.perf_counter() - stage
+
+            stage = time.perf_counter()
+            outcomes = _loop.run_until_complete(_score_requests(requests))
+            timings["inference"] += time.perf_counter() - stage
+
+            stage = time.perf_counter()
+            records = []
+            for (line_offset, line), outcome in zip(lines, outcomes):
+                record = {"offset": line_offset}
+                if isinstance(outcome, BaseException):
+                    record["error"] = getattr(outcome, "detail", None) or str(outcome)
+                    checkpoint["errors"] += 1
+                else:
+                    record["results"] = outcome
+                records.append(json.dumps(record, default=str) + "\n")
+            sink.write("".join(records).encode())
+            sink.flush()
+            os.fsync(sink.fileno())
+            checkpoint.update(offset=offset, output_bytes=sink.tell(), docs=checkpoint["docs"] + len(lines))
+            _write_checkpoint(checkpoint_path, checkpoint)
+            timings["write"] += time.perf_counter() - stage
+
+    return {
+        "docs": checkpoint["docs"] - docs_before,
+        "errors": checkpoint["errors"],
+        "seconds": time.perf_counter() - started,
+        "load_seconds": _load_seconds,
+        "timings": timings,
+    }
+
+
+def plan_shards(input_path, count):
+    # Byte ranges aligned to line starts so each line belongs to one shard
+    size = os.path.getsize(input_path)
+    boundaries = [0]
+    with open(input_path, "rb") as handle:
+        for shard in range(1, count):
+            handle.seek(max(size * shard // count, boundaries[-1]))
+            if handle.tell() > 0:
+                handle.readline()
+            boundaries.append(min(handle.tell(), size))
+    boundaries.append(size)
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+
+
+def _flatten(record):
+    # One columnar row per analysed item
+    if "error" in record:
+        yield {"offset": record["offset"], "item": None, "label": None, "score": None,
+               "overall_risk": None, "error": record["error"]}
+        return
+    for item, result in enumerate(record["results"]):
+        yield {
+            "offset": record["offset"],
+            "item": item,
+            "label": result.get("label"),
+            "score": result.get("overall_sentiment"),
+            "overall_risk": result.get("overall_risk"),
+            "error": None,
+        }
+
+
+def merge_parts(part_paths, output_path, output_format, batch_rows=65536):
+    if output_format == "jsonl":
+        with open(output_path, "wb") as output:
+            for part_path in part_paths:
+                with open(part_path, "rb") as part:
+                    while True:
+                        block = part.read(1 << 20)
+                        if not block:
+                            break
+                        output.write(block)
+        return
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    rows = []
+    try:
+        for part_path in part_paths:
+            with open(part_path) as part:
+                for line in part:
+                    rows.extend(_flatten(json.loads(line)))
+                    if len(rows) >= batch_rows:
+                        table = pa.Table.from_pylist(rows)
+                        writer = writer or pq.ParquetWriter(output_path, table.schema)
+                        writer.write_table(table)
+                        rows = []
+        if rows or writer is None:
+            table = pa.Table.from_pylist(rows)
+            writer = writer or pq.ParquetWriter(output_path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a JSONL corpus with the AI engine across processes")
+    parser.add_argument("input", help="Input JSONL file")
+    parser.add_argument("output", help="Output file")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads-per-worker", type=int, default=0,
+                        help="torch threads per worker (default: cores / workers)")
+    parser.add_argument("--shards-per-worker", type=int, default=4,
+                        help="More shards than workers keeps the pool busy until the end")
+    parser.add_argument("--chunk-size", type=int, default=256, help="Documents scored and checkpointed together")
+    parser.add_argument("--resume", action="store_true", help="Continue from the checkpoints of a previous run")
+    args = parser.parse_args()
+
+    if args.format == "parquet":
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            parser.error("pyarrow is required for --format parquet")
+
+    workers = max(1, args.workers)
+    threads = args.threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+    plan_path = f"{args.output}.plan.json"
+
+    if args.resume and os.path.exists(plan_path):
+        with open(plan_path) as handle:
+            shards = [tuple(shard) for shard in json.load(handle)]
+    else:
+        shards = plan_shards(args.input, workers * max(1, args.shards_per_worker))
+        for index in range(len(shards)):
+            for stale in (f"{args.output}.part-{index:05d}", f"{args.output}.part-{index:05d}.ckpt"):
+                if os.path.exists(stale):
+                    os.remove(stale)
+        with open(plan_path, "w") as handle:
+            json.dump(shards, handle)
+    part_paths = [f"{args.output}.part-{index:05d}" for index in range(len(shards))]
+
+    started = time.perf_counter()
+    totals = {"docs": 0, "errors": 0, "read": 0.0, "parse": 0.0, "inference": 0.0, "write": 0.0}
+    load_seconds = []
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(threads, args.chunk_size)
+    ) as pool:
+        futures = [
+            pool.submit(score_shard, args.input, start, end, part_path, args.chunk_size)
+            for (start, end), part_path in zip(shards, part_paths)
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            totals["docs"] += result["docs"]
+            totals["errors"] += result["errors"]
+            for stage, seconds in result["timings"].items():
+                totals[stage] += seconds
+            load_seconds.append(result["load_seconds"])
+            elapsed = time.perf_counter() - started
+            print(f"{totals['docs']} docs, {totals['docs'] / elapsed:.1f} docs/sec", file=sys.stderr)
+
+    merge_started = time.perf_counter()
+    merge_parts(part_paths, args.output, args.format)
+    merge_seconds = time.perf_counter() - merge_started
+    for part_path in part_paths:
+        os.remove(part_path)
+        os.remove(f"{part_path}.ckpt")
+    os.remove(plan_path)
+
+    elapsed = time.perf_counter() - started
+    print(f"Scored {totals['docs']} documents ({totals['errors']} errors) in {elapsed:.1f}s "
+          f"with {workers} workers x {threads} threads: {totals['docs'] / elapsed:.1f} docs/sec")
+    print(f"  model load (max per worker) {max(load_seconds, default=0.0):8.2f}s")
+    for stage in ("read", "parse", "inference", "write"):
+        print(f"  {stage:<27}{totals[stage]:8.2f}s (summed over workers)")
+    print(f"  merge                      {merge_seconds:8.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Accuracy-parity and latency comparison of the sentiment backends.
+
+Scores a fixed corpus with every requested backend, checks label agreement
+against eager torch, and measures per-batch latency and throughput:
+
+    python bench_backends.py --backends torch torch-int8 onnx --batch-sizes 1 8 32
+    python bench_backends.py --corpus corpus.jsonl --min-agreement 0.98
+
+``--corpus`` accepts plain text (one document per line) or JSONL with a
+``content`` or ``text`` field. Exits non-zero when a backend agrees with the
+eager model on fewer than ``--min-agreement`` of the documents.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from ai_engine import SENTIMENT_BACKENDS, load_classifier
+
+DEFAULT_CORPUS = [
+    "Revenue grew 12% year over year, beating analyst expectations.",
+    "The company missed its quarterly earnings target by a wide margin.",
+    "Customer satisfaction scores are at an all-time high.",
+    "Supply chain disruptions continue to delay shipments to key markets.",
+    "The new product launch was well received by enterprise customers.",
+    "Regulators opened an investigation into the firm's accounting practices.",
+    "Operating margins improved thanks to lower logistics costs.",
+    "Churn increased sharply after the price change.",
+    "Management raised full-year guidance on strong cloud demand.",
+    "A data breach exposed the records of thousands of users.",
+    "The partnership gives us access to a fast-growing regional market.",
+    "Competitors are undercutting our prices and winning market share.",
+    "Cash flow from operations remained stable this quarter.",
+    "The board approved a large share buyback program.",
+    "Layoffs were announced across the manufacturing division.",
+    "Our AI platform is helping clients cut processing time in half.",
+    "Inventory write-downs weighed heavily on gross profit.",
+    "Analysts upgraded the stock after the strong earnings call.",
+    "The outage lasted for hours and frustrated many customers.",
+    "Hiring has accelerated as demand for our services keeps rising.",
+    "Currency volatility reduced reported international revenue.",
+    "The acquisition is expected to be accretive to earnings next year.",
+    "Product quality issues led to a costly recall.",
+    "The team delivered the project ahead of schedule and under budget.",
+]
+
+
+def load_corpus(path):
+    with open(path) as handle:
+        lines = [line.strip() for line in handle if line.strip()]
+    if path.endswith(".jsonl"):
+        records = [json.loads(line) for line in lines]
+        return [record.get("content") or record.get("text") or "" for record in records]
+    return lines
+
+
+def signed_scores(results):
+    # Map {"label", "score"} onto one axis so backends can be compared numerically
+    return np.array([
+        -result["score"] if str(result["label"]).upper().startswith("NEG") else result["score"]
+        for result in results
+    ])
+
+
+def time_batches(classifier, corpus, batch_size, repeat):
+    classifier(corpus[:batch_size], batch_size=batch_size)  # warmup
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for start in range(0, len(corpus), batch_size):
+            batch_started = time.perf_counter()
+            classifier(corpus[start:start + batch_size], batch_size=batch_size)
+            latencies.append(time.perf_counter() - batch_started)
+    elapsed = time.perf_counter() - started
+    return {
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p95_ms": float(np.percentile(latencies, 95) * 1000),
+        "docs_per_sec": len(corpus) * repeat / elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare sentiment backends for parity and speed")
+    parser.add_argument("--model", default=os.getenv("SENTIMENT_MODEL", "distilbert-base-uncased-finetuned-sst-2-english"))
+    parser.add_argument("--backends", nargs="+", default=list(SENTIMENT_BACKENDS), choices=SENTIMENT_BACKENDS)
+    parser.add_argument("--corpus", help="Text or JSONL corpus (defaults to a built-in business corpus)")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 8, 32])
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the corpus per batch size")
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1, help="Intra-op threads per backend")
+    parser.add_argument("--min-agreement", type=float, default=0.99,
+                        help="Minimum label agreement with eager torch")
+    parser.add_argument("--output", help="Write the full report to this JSON file")
+    args = parser.parse_args()
+
+    import torch
+
+    torch.set_num_threads(args.threads)
+    corpus = load_corpus(args.corpus) if args.corpus else DEFAULT_CORPUS
+    reference = load_classifier(args.model, "torch")(corpus, batch_size=32)
+    reference_labels = [result["label"] for result in reference]
+    reference_scores = signed_scores(reference)
+
+    report = {}
+    for backend in args.backends:
+        load_started = time.perf_counter()
+        classifier = load_classifier(args.model, backend, threads=args.threads)
+        load_seconds = time.perf_counter() - load_started
+
+        results = classifier(corpus, batch_size=32)
+        agreement = float(np.mean([result["label"] == label for result, label in zip(results, reference_labels)]))
+        report[backend] = {
+            "load_seconds": load_seconds,
+            "label_agreement": agreement,
+            "max_score_delta": float(np.abs(signed_scores(results) - reference_scores).max()),
+            "batches": {
+                str(batch_size): time_batches(classifier, corpus, batch_size, args.repeat)
+                for batch_size in args.batch_sizes
+            },
+        }
+
+    print(f"{'backend':<12}{'agree':>8}{'max Δ':>9}{'batch':>7}{'p50 ms':>10}{'p95 ms':>10}{'docs/s':>10}")
+    for backend, result in report.items():
+        for batch_size, timing in result["batches"].items():
+            print(f"{backend:<12}{result['label_agreement']:>8.3f}{result['max_score_delta']:>9.4f}{batch_size:>7}"
+                  f"{timing['p50_ms']:>10.2f}{timing['p95_ms']:>10.2f}{timing['docs_per_sec']:>10.1f}")
+
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2)
+
+    failing = [backend for backend, result in report.items() if result["label_agreement"] < args.min_agreement]
+    if failing:
+        print(f"Parity check failed for: {', '.join(failing)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""In-process load test for the AI engine HTTP API.
+
+Drives the FastAPI ``app`` over ASGI (no sockets, no server process) and
+replays a request mix at a fixed concurrency, reporting throughput and
+p50/p95/p99 latency per endpoint:
+
+    python bench_engine.py --requests 2000 --concurrency 32 --output engine.json
+    python bench_engine.py --mix recorded.jsonl --baseline engine.json --max-regression 0.2
+
+``--mix`` is JSONL with one request per line:
+``{"endpoint": "/api/sentiment", "body": {...}}`` (``method`` defaults to
+POST). The mix is cycled until ``--requests`` have been sent. Without it a
+built-in mix of ``/api/analyze`` (including full ``analysis`` items),
+``/api/sentiment`` and ``/api/risks`` is used.
+
+By default the models are replaced with a lexicon stub that sleeps
+``--stub-latency-ms`` per forward pass, so the numbers measure the serving
+path (validation, batching, executor, cache, serialization) and need no
+network. ``--model`` benchmarks a real local model instead. With the stub,
+the run starts by checking that a request naming one content under several
+item types costs one forward pass per model.
+
+The script exits non-zero when any request fails, since latency measured
+over shed or failed requests is meaningless; pass ``--allow-errors`` to
+report the numbers anyway. With ``--baseline`` it also exits non-zero when
+an endpoint's p95 latency grows, or its throughput drops, by more than
+``--max-regression``.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+STUB_POSITIVE = {"good", "great", "strong", "growth", "grew", "improved", "beat", "record", "profit", "gain"}
+STUB_NEGATIVE = {"bad", "weak", "loss", "decline", "risk", "missed", "fell", "breach", "delay", "churn"}
+
+DEFAULT_TEXTS = [
+    "Revenue grew 12% year over year, beating analyst expectations.",
+    "The company missed its quarterly earnings target by a wide margin.",
+    "Supply chain disruptions continue to delay shipments to key markets.",
+    "Operating margins improved thanks to lower logistics costs.",
+    "Churn increased sharply after the price change. Competitors are gaining share.",
+    "Management raised full-year guidance on strong cloud demand. Hiring has accelerated.",
+    "A data breach exposed the records of thousands of users and regulators are investigating.",
+    "Cash flow from operations remained stable this quarter.",
+]
+
+
+class StubClassifier:
+    """Word-lexicon stand-in with the ``SequenceClassifier`` call signature."""
+
+    def __init__(self, latency_ms: float):
+        self.latency = latency_ms / 1000
+        self.texts = Counter()
+
+    def __call__(self, texts, batch_size=None, truncation=True):
+        self.texts.update(texts)
+        if self.latency:
+            time.sleep(self.latency)
+        results = []
+        for text in texts:
+            words = set(text.lower().split())
+            balance = len(words & STUB_POSITIVE) - len(words & STUB_NEGATIVE)
+            results.append({
+                "label": "NEGATIVE" if balance < 0 else "POSITIVE",
+                "score": 0.5 + min(abs(balance), 4) / 9,
+            })
+        return results
+
+
+def default_mix():
+    mix = []
+    context = {"source": "bench"}
+    for index, text in enumerate(DEFAULT_TEXTS):
+        mix.append({"endpoint": "/api/sentiment", "body": {
+            "context": context, "data": [{"type": "sentiment", "content": text}]
+        }})
+        mix.append({"endpoint": "/api/risks", "body": {
+            "context": context, "data": [{"type": "risks", "content": text}]
+        }})
+        mix.append({"endpoint": "/api/analyze", "body": {
+            "context": context,
+            "data": [
+                {"type": "sentiment", "content": text},
+                {"type": "risks", "content": DEFAULT_TEXTS[(index + 1) % len(DEFAULT_TEXTS)]},
+            ],
+        }})
+        mix.append({"endpoint": "/api/analyze", "body": {
+            "context": context, "data": [{"type": "analysis", "content": text}]
+        }})
+    return mix
+
+
+def load_mix(path):
+    with open(path) as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+
+def configure_engine(args):
+    # Must run before ai_engine is imported: the engine reads its settings at import
+    os.environ["MODEL_LOAD_MODE"] = "lazy"
+    if args.model:
+        os.environ["SENTIMENT_MODEL"] = args.model
+    if args.no_cache:
+        os.environ["RESULT_CACHE_MAX_ENTRIES"] = "0"
+
+    import ai_engine
+
+    engine = ai_engine.ai_engine
+    stubs = {}
+    if not args.model:
+        for name in ("sentiment", "aspect"):
+            stub = stubs[name] = StubClassifier(args.stub_latency_ms)
+            engine.models.register(name, lambda stub=stub: stub, key=("stub", name), source="stub")
+    return ai_engine.app, stubs
+
+
+def check_shared_passes(stubs):
+    """Fail unless one content sent as several item types is scored once per model."""
+    import ai_engine
+
+    content = f"Revenue grew strongly in bench run {time.time_ns()}."
+    items = [ai_engine.DataItem(type=item_type, content=content) for item_type in ("sentiment", "analysis", "risks")]
+    asyncio.run(ai_engine.ai_engine.analyze_items(items, {"source": "bench"}))
+    passes = {name: stub.texts[content] for name, stub in stubs.items()}
+    if any(count != 1 for count in passes.values()):
+        sys.exit(f"Shared-stage check failed: one content was scored {passes} times")
+
+
+async def replay(app, mix, total, concurrency, warmup):
+    import httpx
+
+    # ASGITransport does not send lifespan events, so run startup/shutdown here
+    transport = httpx.ASGITransport(app=app)
+    latencies = {}
+    failures = {}
+    statuses = Counter()
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            async def send(request):
+                return await client.request(
+                    request.get("method", "POST"), request["endpoint"], json=request.get("body")
+                )
+
+            for request in itertools.islice(itertools.cycle(mix), warmup):
+                await send(request)
+
+            requests = itertools.islice(itertools.cycle(mix), total)
+
+            async def worker():
+                for request in requests:
+                    started = time.perf_counter()
+                    response = await send(request)
+                    elapsed = time.perf_counter() - started
+                    endpoint = request["endpoint"]
+                    latencies.setdefault(endpoint, []).append(elapsed)
+                    if response.status_code >= 400:
+                        failures[endpoint] = failures.get(endpoint, 0) + 1
+                        statuses[response.status_code] += 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            wall = time.perf_counter() - started
+    return latencies, failures, statuses, wall
+
+
+def summarize(latencies, failures, wall):
+    summary = {}
+    everything = []
+    for endpoint, samples in sorted(latencies.items()):
+        everything.extend(samples)
+        summary[endpoint] = describe(samples, failures.get(endpoint, 0), wall)
+    summary["all"] = describe(everything, sum(failures.values()), wall)
+    return summary
+
+
+def describe(samples, failed, wall):
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99]) * 1000
+    return {
+        "requests": len(samples),
+        "errors": failed,
+        "throughput_rps": len(samples) / wall,
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+    }
+
+
+def compare(summary, baseline, max_regression):
+    regressions = []
+    for endpoint, stats in summary.items():
+        reference = baseline.get(endpoint)
+        if not reference:
+            continue
+        if stats["p95_ms"] > reference["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{endpoint}: p95 {stats['p95_ms']:.1f}ms vs baseline {reference['p95_ms']:.1f}ms")
+        if stats["throughput_rps"] < reference["throughput_rps"] * (1 - max_regression):
+            regressions.append(
+                f"{endpoint}: {stats['throughput_rps']:.1f} req/s vs baseline {reference['throughput_rps']:.1f} req/s"
+            )
+        if stats["errors"] > reference.get("errors", 0):
+            regressions.append(f"{endpoint}: {stats['errors']} errors vs baseline {reference.get('errors', 0)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the AI engine endpoints in-process")
+    parser.add_argument("--mix", help="JSONL file of recorded requests to replay")
+    parser.add_argument("--requests", type=int, default=1000, help="Total requests to send")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests kept in flight")
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed requests sent first")
+    parser.add_argument("--model", help="Benchmark this local sentiment model instead of the stub")
+    parser.add_argument("--stub-latency-ms", type=float, default=5.0, help="Simulated forward-pass time of the stub")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the result cache")
+    parser.add_argument("--allow-errors", action="store_true",
+                        help="Exit zero even if some requests failed")
+    parser.add_argument("--output", help="Write the summary to this JSON file")
+    parser.add_argument("--baseline", help="Compare against a previously written JSON file")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="Allowed p95 / throughput regression per endpoint (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    app, stubs = configure_engine(args)
+    if stubs:
+        check_shared_passes(stubs)
+    mix = load_mix(args.mix) if args.mix else default_mix()
+    latencies, failures, statuses, wall = asyncio.run(
+        replay(app, mix, args.requests, max(1, args.concurrency), args.warmup)
+    )
+    summary = summarize(latencies, failures, wall)
+
+    print(f"{'endpoint':<20}{'requests':>9}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for endpoint, stats in summary.items():
+        print(f"{endpoint:<20}{stats['requests']:>9}{stats['errors']:>8}{stats['throughput_rps']:>10.1f}"
+              f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}")
+
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(summary, handle, indent=2)
+
+    failed = summary["all"]["errors"]
+    if failed:
+        codes = ", ".join(f"{count} x {code}" for code, count in sorted(statuses.items()))
+        print(f"WARNING: {failed} of {summary['all']['requests']} requests failed ({codes}); "
+              "latency figures include failed requests", file=sys.stderr)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as handle:
+            regressions = compare(summary, json.load(handle), args.max_regression)
+        if regressions:
+            print("Latency regressions:\n  " + "\n  ".join(regressions))
+    if regressions or (failed and not args.allow_errors):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
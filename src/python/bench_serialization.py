@@ -0,0 +1,95 @@
+"""Micro-benchmark of the response serialization paths.
+
+Builds a representative ``/api/analyze`` payload and times each way of
+turning it into response bytes:
+
+* ``validated+jsonable+json`` - ``AnalysisResponse(**payload)`` then
+  FastAPI's ``jsonable_encoder`` and the stdlib encoder (the old path)
+* ``dict+jsonable+json`` - returning a plain dict from a handler
+* ``construct+orjson`` - ``AnalysisResponse.model_construct`` then orjson
+* ``dict+orjson`` / ``dict+msgpack`` - what ``negotiated_response`` does
+
+    python bench_serialization.py --items 1 32 256 --repeat 200
+"""
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault("MODEL_LOAD_MODE", "lazy")
+
+from fastapi.encoders import jsonable_encoder
+
+from ai_engine import AnalysisResponse, Insight, MarketAnalysis, ai_engine, dumps_json, dumps_msgpack, msgpack, orjson
+
+
+def build_payload(items):
+    payload = ai_engine._build_analysis_result("benchmark")
+    payload["results"] = [
+        {
+            "overall_sentiment": 0.91,
+            "label": "POSITIVE",
+            "aspects": [
+                {"topic": topic, "sentiment": 0.8, "confidence": 0.8}
+                for topic in ("market", "product", "customer", "financial")
+            ],
+            "emotionalTone": {"primary": "neutral", "secondary": ["analytical", "confident"], "intensity": 0.7},
+            "confidence": 0.91,
+        }
+        for _ in range(items)
+    ]
+    return payload
+
+
+def stdlib_dumps(content):
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def construct(payload):
+    return AnalysisResponse.model_construct(
+        **{
+            **payload,
+            "market_analysis": MarketAnalysis.model_construct(**payload["market_analysis"]),
+            "insights": [Insight.model_construct(**insight) for insight in payload["insights"]],
+        }
+    )
+
+
+def paths(payload):
+    yield "validated+jsonable+json", lambda: stdlib_dumps(jsonable_encoder(AnalysisResponse(**payload)))
+    yield "dict+jsonable+json", lambda: stdlib_dumps(jsonable_encoder(payload))
+    yield "construct+orjson", lambda: dumps_json(construct(payload))
+    yield "dict+orjson", lambda: dumps_json(payload)
+    if msgpack is not None:
+        yield "dict+msgpack", lambda: dumps_msgpack(payload)
+
+
+def time_path(fn, repeat):
+    fn()  # warmup
+    started = time.perf_counter()
+    for _ in range(repeat):
+        body = fn()
+    return (time.perf_counter() - started) / repeat, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare response serialization paths")
+    parser.add_argument("--items", type=int, nargs="+", default=[1, 32, 256], help="Per-item results in the payload")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    if orjson is None:
+        print("orjson is not installed; the orjson rows use the stdlib fallback")
+    for items in args.items:
+        payload = build_payload(items)
+        print(f"\n{items} item(s)")
+        print(f"{'path':<26}{'us/op':>10}{'bytes':>10}{'speedup':>9}")
+        baseline = None
+        for name, fn in paths(payload):
+            seconds, size = time_path(fn, args.repeat)
+            baseline = baseline or seconds
+            print(f"{name:<26}{seconds * 1e6:>10.1f}{size:>10}{baseline / seconds:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
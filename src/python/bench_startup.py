@@ -0,0 +1,120 @@
+"""Cold-start benchmark for the AI engine process.
+
+Each run starts a fresh interpreter and times the startup phases separately:
+
+* ``module_import`` - importing ``ai_engine`` (should stay well under a second)
+* ``framework_import`` - importing torch / transformers / sentence_transformers
+* ``<model>.load`` / ``<model>.warmup`` - per-model load and first forward pass
+* ``ready`` - interpreter start until every model is loaded and warm
+
+    python bench_startup.py --runs 3 --output startup.json
+    python bench_startup.py --baseline startup.json --max-regression 0.2
+
+With ``--baseline`` the script exits non-zero when any phase's median is
+slower than the baseline by more than ``--max-regression``.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+CHILD_SCRIPT = r"""
+import json, time
+started = time.perf_counter()
+import ai_engine
+imported = time.perf_counter()
+import torch, transformers, sentence_transformers
+frameworks = time.perf_counter()
+ai_engine.ai_engine.models.load_all()
+loaded = time.perf_counter()
+print(json.dumps({
+    "module_import": imported - started,
+    "framework_import": frameworks - imported,
+    "models": ai_engine.ai_engine.models.status(),
+    "in_process": loaded - started,
+}))
+"""
+
+
+def run_once(env):
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    wall = time.perf_counter() - started
+    report = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    phases = {
+        "interpreter": wall - report["in_process"],
+        "module_import": report["module_import"],
+        "framework_import": report["framework_import"],
+        "ready": wall,
+    }
+    for name, info in report["models"].items():
+        if info.get("status") != "loaded":
+            raise RuntimeError(f"Model {name} failed to load: {info.get('error')}")
+        if "shared_with" in info:
+            # Loaded once under its owner's name; timing it again would double-count
+            continue
+        phases[f"{name}.load"] = info["load_seconds"]
+        phases[f"{name}.warmup"] = info["warmup_seconds"]
+        phases[f"{name}.memory_mb"] = info["memory_mb"]
+    return phases
+
+
+def summarize(runs):
+    return {phase: statistics.median(run[phase] for run in runs) for phase in runs[0]}
+
+
+def compare(summary, baseline, max_regression):
+    regressions = []
+    for phase, value in summary.items():
+        reference = baseline.get(phase)
+        if phase.endswith(".memory_mb") or not reference:
+            continue
+        if value > reference * (1 + max_regression):
+            regressions.append(f"{phase}: {value:.3f}s vs baseline {reference:.3f}s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure AI engine cold-start time by phase")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh-process runs to take the median of")
+    parser.add_argument("--offline", action="store_true", help="Run with AI_ENGINE_OFFLINE=1")
+    parser.add_argument("--output", help="Write the median phase timings to this JSON file")
+    parser.add_argument("--baseline", help="Compare against a previously written JSON file")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="Allowed slowdown per phase relative to the baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    env = dict(os.environ, MODEL_LOAD_MODE="lazy")
+    if args.offline:
+        env["AI_ENGINE_OFFLINE"] = "1"
+
+    summary = summarize([run_once(env) for _ in range(max(1, args.runs))])
+    for phase, value in summary.items():
+        unit = "MB" if phase.endswith(".memory_mb") else "s"
+        print(f"{phase:<28}{value:>10.3f} {unit}")
+
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(summary, handle, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            regressions = compare(summary, json.load(handle), args.max_regression)
+        if regressions:
+            print("Startup regressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
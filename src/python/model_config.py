@@ -0,0 +1,60 @@
+"""Which models the AI engine serves and where it loads them from.
+
+Kept apart from ``ai_engine`` so tools such as ``snapshot_models.py`` can
+read the configuration without building the engine.
+"""
+import os
+from typing import Dict, List
+
+# In offline mode models are only ever read from MODEL_CACHE_DIR (see
+# snapshot_models) and the Hub is never contacted; a Hub token, when needed,
+# is read from HF_TOKEN.
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", "")
+OFFLINE_MODE = os.getenv("AI_ENGINE_OFFLINE", "0") == "1"
+if OFFLINE_MODE:
+    os.environ["HF_HUB_OFFLINE"] = "1"
+    os.environ["TRANSFORMERS_OFFLINE"] = "1"
+
+# Hub repositories for the short model names used by default
+SNAPSHOT_REPO_IDS = {
+    "distilbert-base-uncased-finetuned-sst-2-english": "distilbert/distilbert-base-uncased-finetuned-sst-2-english",
+    "all-MiniLM-L6-v2": "sentence-transformers/all-MiniLM-L6-v2",
+}
+
+def configured_models() -> Dict[str, str]:
+    """Model name for each engine role, from the environment."""
+    sentiment = os.getenv("SENTIMENT_MODEL", "distilbert-base-uncased-finetuned-sst-2-english")
+    return {
+        "sentiment": sentiment,
+        "aspect": os.getenv("ASPECT_MODEL", sentiment),
+        "embeddings": os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2"),
+    }
+
+def _snapshot_dir(model_name: str, cache_dir: str) -> str:
+    return os.path.join(cache_dir, model_name.replace("/", "--"))
+
+def resolve_model_path(model_name: str) -> str:
+    """Prefer a pre-snapshotted local copy of ``model_name`` when one exists."""
+    if os.path.isdir(model_name):
+        return model_name
+    if MODEL_CACHE_DIR:
+        local_path = _snapshot_dir(model_name, MODEL_CACHE_DIR)
+        if os.path.isdir(local_path):
+            return local_path
+    if OFFLINE_MODE:
+        raise RuntimeError(f"Model {model_name} is not in MODEL_CACHE_DIR and offline mode is enabled")
+    return model_name
+
+def snapshot_models(model_names: List[str], cache_dir: str) -> Dict[str, str]:
+    """Download full model snapshots into ``cache_dir`` for offline starts."""
+    from huggingface_hub import snapshot_download
+
+    paths = {}
+    for model_name in model_names:
+        repo_id = model_name if "/" in model_name else SNAPSHOT_REPO_IDS.get(model_name, model_name)
+        paths[model_name] = snapshot_download(
+            repo_id=repo_id,
+            local_dir=_snapshot_dir(model_name, cache_dir),
+            token=os.getenv("HF_TOKEN")
+        )
+    return paths
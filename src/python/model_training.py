@@ -0,0 +1,304 @@
+"""Model definitions and training entry point for the Flask server.
+
+Kept out of ``server.py`` so training processes can import it without
+starting a second server: ``train_model`` runs in the scheduler's process
+pool and returns plain weight arrays, which the server loads into a fresh
+model of the same architecture.
+
+``CustomerSegmenter`` follows the same ``get_weights`` / ``set_weights``
+contract, with its float32 centroids as the only weight array, so it is
+trained, published and stored like the Keras models. Models in
+``SCALED_MODELS`` also carry an ``OnlineScaler`` that is updated by every
+training job and published with the weights it was trained with.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+from numpy.lib.stride_tricks import sliding_window_view
+from sklearn.cluster import MiniBatchKMeans
+from tensorflow.keras.models import Sequential
+from tensorflow.keras.layers import Dense, LSTM
+
+
+def build_supply_chain_model():
+    model = Sequential([
+        LSTM(64, return_sequences=True, input_shape=(30, 10)),
+        LSTM(32),
+        Dense(16, activation='relu'),
+        Dense(1)
+    ])
+    model.compile(optimizer='adam', loss='mse')
+    return model
+
+
+def build_customer_intelligence_model():
+    model = Sequential([
+        Dense(64, activation='relu', input_shape=(20,)),
+        Dense(32, activation='relu'),
+        Dense(16, activation='relu'),
+        Dense(8, activation='softmax')
+    ])
+    model.compile(optimizer='adam', loss='categorical_crossentropy')
+    return model
+
+
+# Periods of history per forecast; the dashboard sends eight
+DEMAND_LOOKBACK = 8
+
+
+def build_demand_forecast_model():
+    model = Sequential([
+        Dense(32, activation='relu', input_shape=(DEMAND_LOOKBACK,)),
+        Dense(16, activation='relu'),
+        Dense(1)
+    ])
+    model.compile(optimizer='adam', loss='mse')
+    return model
+
+
+def demand_panel(series, width=DEMAND_LOOKBACK):
+    """``series`` as a finite float32 ``(n_series, periods)`` panel of at least ``width`` periods.
+
+    Shorter histories are padded on the left with their first value.
+    """
+    panel = np.asarray(series, dtype=np.float32)
+    if panel.ndim == 1:
+        panel = panel[np.newaxis]
+    if panel.ndim != 2 or panel.shape[1] == 0:
+        raise ValueError(f'Expected a (series, periods) demand panel, got shape {panel.shape}')
+    if not np.isfinite(panel).all():
+        raise ValueError('Demand series must be finite numbers')
+    if panel.shape[1] < width:
+        panel = np.pad(panel, ((0, 0), (width - panel.shape[1], 0)), mode='edge')
+    return panel
+
+
+def normalize_windows(windows):
+    """Scale each window by its mean absolute level, so SKUs of any volume share one model."""
+    level = np.maximum(np.abs(windows).mean(axis=-1, keepdims=True), 1e-6)
+    return windows / level, level
+
+
+def demand_training_set(series, lookback=DEMAND_LOOKBACK):
+    """Every (lookback history, next period) pair of a demand panel, normalized."""
+    panel = demand_panel(series, lookback + 1)
+    # (n_series, n_windows, lookback + 1) strided view; only the reshape below copies
+    windows = sliding_window_view(panel, lookback + 1, axis=1).reshape(-1, lookback + 1)
+    features, level = normalize_windows(windows[:, :-1])
+    return features, windows[:, -1:] / level
+
+
+CUSTOMER_DATA_DIR = os.getenv('CUSTOMER_DATA_DIR', os.path.join('data', 'customers'))
+
+
+def resolve_data_path(path):
+    """Resolve ``path`` inside ``CUSTOMER_DATA_DIR``, rejecting anything outside it."""
+    root = os.path.realpath(CUSTOMER_DATA_DIR)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, resolved]) != root:
+        raise ValueError(f'Path must be inside {CUSTOMER_DATA_DIR}: {path}')
+    if not resolved.endswith(('.npy', '.csv')):
+        raise ValueError(f'Expected a .npy or .csv feature file: {path}')
+    return resolved
+
+
+def iter_feature_chunks(path, chunk_size=65536, columns=None):
+    """Yield float32 row blocks of a ``.npy`` (memory-mapped) or ``.csv`` (streamed) feature file."""
+    if path.endswith('.npy'):
+        features = np.load(path, mmap_mode='r')
+        if features.ndim != 2:
+            raise ValueError(f'Expected a 2-D feature array, got shape {features.shape}')
+        if columns is not None:
+            features = features[:, columns]
+        for start in range(0, len(features), chunk_size):
+            yield np.asarray(features[start:start + chunk_size], dtype=np.float32)
+    else:
+        for frame in pd.read_csv(path, chunksize=chunk_size, usecols=columns):
+            yield frame.to_numpy(dtype=np.float32)
+
+
+class CustomerSegmenter:
+    """Mini-batch k-means customer segmentation.
+
+    ``fit_stream`` feeds row blocks to ``MiniBatchKMeans.partial_fit``, so
+    the training set never has to fit in memory. Only the float32 centroids
+    are kept. ``assign`` scores a whole block with one matrix product:
+    ``argmin ||x - c||^2`` is ``argmin (||c||^2 - 2 x.c)``, as ``||x||^2``
+    is the same for every centroid.
+    """
+
+    def __init__(self, n_segments=8, chunk_size=65536, seed=0):
+        self.n_segments = int(n_segments)
+        self.chunk_size = max(1, int(chunk_size))
+        self.seed = seed
+        self.centroids = None
+        self._norms = None
+
+    def fit_stream(self, chunks, epochs=1):
+        """Fit on an iterable of row blocks; ``chunks`` is called once per epoch."""
+        kmeans = MiniBatchKMeans(n_clusters=self.n_segments, random_state=self.seed, n_init=3)
+        rows = 0
+        for _ in range(max(1, int(epochs))):
+            for block in chunks():
+                # partial_fit needs at least n_clusters rows to initialise
+                if len(block) >= self.n_segments or hasattr(kmeans, 'cluster_centers_'):
+                    kmeans.partial_fit(block)
+                    rows += len(block)
+        if rows == 0:
+            raise ValueError(f'Need at least {self.n_segments} rows to fit {self.n_segments} segments')
+        self.set_weights([kmeans.cluster_centers_])
+        return rows
+
+    def get_weights(self):
+        return [self.centroids]
+
+    def set_weights(self, weights):
+        self.centroids = np.ascontiguousarray(weights[0], dtype=np.float32)
+        self.n_segments = len(self.centroids)
+        self._norms = np.einsum('ij,ij->i', self.centroids, self.centroids)
+
+    def assign(self, features, return_distance=False):
+        """Segment index (and squared distance) for every row of ``features``."""
+        if self.centroids is None:
+            raise ValueError('Customer segments not fitted')
+        features = features if isinstance(features, np.ndarray) else np.asarray(features, dtype=np.float32)
+        if features.ndim == 1:
+            features = features[np.newaxis]
+        if features.ndim != 2 or features.shape[1] != self.centroids.shape[1]:
+            raise ValueError(f'Expected features of shape (n, {self.centroids.shape[1]}), got {features.shape}')
+
+        labels = np.empty(len(features), dtype=np.int32)
+        distances = np.empty(len(features), dtype=np.float32) if return_distance else None
+        transposed = self.centroids.T
+        for start in range(0, len(features), self.chunk_size):
+            block = np.asarray(features[start:start + self.chunk_size], dtype=np.float32)
+            scores = block @ transposed
+            scores *= -2
+            scores += self._norms
+            block_labels = scores.argmin(axis=1)
+            labels[start:start + len(block)] = block_labels
+            if return_distance:
+                nearest = scores[np.arange(len(block)), block_labels] + np.einsum('ij,ij->i', block, block)
+                distances[start:start + len(block)] = np.maximum(nearest, 0)
+        return (labels, distances) if return_distance else labels
+
+
+def build_customer_segments_model():
+    return CustomerSegmenter()
+
+
+class OnlineScaler:
+    """Running per-feature mean and variance over the last axis of the inputs.
+
+    ``partial_fit`` folds each batch into the running statistics with the
+    batched form of Welford's update (Chan et al.), so the scaler follows
+    the training data as it arrives without keeping any of it.
+    ``transform_`` standardises a float32 array in place.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = None
+        self.m2 = None
+        self._shift = None
+        self._scale = None
+
+    @property
+    def variance(self):
+        return self.m2 / self.count if self.count else None
+
+    def partial_fit(self, features):
+        rows = np.asarray(features, dtype=np.float64)
+        rows = rows.reshape(-1, rows.shape[-1])
+        if len(rows) == 0:
+            return self
+        batch_mean = rows.mean(axis=0)
+        batch_m2 = np.square(rows - batch_mean).sum(axis=0)
+        if self.count == 0:
+            self.mean, self.m2 = batch_mean, batch_m2
+        else:
+            if batch_mean.shape != self.mean.shape:
+                raise ValueError(f'Expected {len(self.mean)} features, got {len(batch_mean)}')
+            total = self.count + len(rows)
+            delta = batch_mean - self.mean
+            self.mean = self.mean + delta * (len(rows) / total)
+            self.m2 = self.m2 + batch_m2 + np.square(delta) * (self.count * len(rows) / total)
+        self.count += len(rows)
+
+        std = np.sqrt(self.m2 / self.count)
+        self._shift = self.mean.astype(np.float32)
+        self._scale = (1.0 / np.where(std > 0, std, 1.0)).astype(np.float32)
+        return self
+
+    def transform_(self, features):
+        """Standardise a writable float32 array in place and return it."""
+        if self.count:
+            features -= self._shift
+            features *= self._scale
+        return features
+
+
+SCALED_MODELS = {'supply_chain', 'customer_intelligence'}
+
+
+MODEL_BUILDERS = {
+    'supply_chain': build_supply_chain_model,
+    'customer_intelligence': build_customer_intelligence_model,
+    'customer_segments': build_customer_segments_model,
+    'demand_forecast': build_demand_forecast_model,
+}
+
+
+def train_customer_segments(data):
+    """Fit segments on ``data["path"]`` (a file in ``CUSTOMER_DATA_DIR``) or inline ``data["features"]``."""
+    segmenter = CustomerSegmenter(
+        n_segments=int(data.get('segments', 8)),
+        chunk_size=int(data.get('chunk_size', 65536)),
+        seed=int(data.get('seed', 0))
+    )
+    if data.get('path'):
+        path = resolve_data_path(data['path'])
+        chunks = lambda: iter_feature_chunks(path, segmenter.chunk_size, data.get('columns'))
+    else:
+        features = np.asarray(data.get('features', []), dtype=np.float32)
+        chunks = lambda: (features[start:start + segmenter.chunk_size]
+                          for start in range(0, len(features), segmenter.chunk_size))
+    segmenter.fit_stream(chunks, epochs=data.get('epochs', 1))
+    return segmenter.get_weights()
+
+
+def train_model(model_type, data, scaler=None):
+    """Build ``model_type`` and fit it on ``data["features"]`` / ``data["targets"]`` when given.
+
+    Demand models can instead be given a ``data["series"]`` panel of histories.
+    ``scaler`` is the published scaler of a model in ``SCALED_MODELS``; it is
+    updated with this batch and returned with the weights as
+    ``{"weights": ..., "scaler": ...}``.
+    """
+    data = data if isinstance(data, dict) else {}
+    if model_type == 'customer_segments':
+        return {'weights': train_customer_segments(data)}
+    if model_type == 'demand_forecast' and data.get('series') is not None:
+        features, targets = demand_training_set(data['series'])
+        data = {**data, 'features': features, 'targets': targets}
+    tf.keras.utils.set_random_seed(int(data.get('seed', 0)))
+    model = MODEL_BUILDERS[model_type]()
+    if model_type in SCALED_MODELS:
+        scaler = scaler or OnlineScaler()
+    if data.get('features') is not None and data.get('targets') is not None:
+        features = np.array(data['features'], dtype=np.float32, order='C')
+        if model_type in SCALED_MODELS:
+            scaler.partial_fit(features).transform_(features)
+        model.fit(
+            features,
+            np.asarray(data['targets'], dtype=np.float32),
+            epochs=int(data.get('epochs', 5)),
+            batch_size=int(data.get('batch_size', 32)),
+            verbose=0
+        )
+    artifact = {'weights': model.get_weights()}
+    if model_type in SCALED_MODELS:
+        artifact['scaler'] = scaler
+    return artifact
@@ -1,95 +1,547 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import numpy as np
 import pandas as pd
 from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
-from sklearn.cluster import KMeans
-from sklearn.preprocessing import StandardScaler
 import tensorflow as tf
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Dense, LSTM
 import joblib
 import json
+import hashlib
+import io
+import multiprocessing
+import os
+import shutil
 import threading
 import queue
 import time
+import uuid
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from model_training import (
+    CUSTOMER_DATA_DIR, DEMAND_LOOKBACK, MODEL_BUILDERS, SCALED_MODELS, demand_panel, normalize_windows,
+    resolve_data_path, train_model
+)
 
 app = Flask(__name__)
 CORS(app)
 
+class BatchingPredictor:
+    """Coalesces concurrent predict calls into one compiled forward pass.
+
+    Callers block on a future while a worker thread collects queued requests
+    until ``max_batch_size`` rows are waiting or ``max_wait_ms`` has passed.
+    The rows run through the model in a single ``tf.function`` call, and each
+    caller gets back its own slice of the output. The function has a fixed
+    ``[None, *input_shape]`` signature, so batch size changes never retrace.
+    Functions are cached per model object, for the current and the previous
+    model, so a model swap never retraces in the request path.
+
+    ``get_serving`` returns the published ``(model, scaler)`` pair. It is
+    looked up once per batch, so a batch always uses the scaler published
+    with its model; the scaler standardises the batch in place.
+    """
+
+    def __init__(self, name, get_serving, input_shape, max_batch_size=64, max_wait_ms=5.0):
+        self.name = name
+        self.get_serving = get_serving
+        self.input_shape = tuple(input_shape)
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue = queue.Queue()
+        self._compiled_cache = {}
+        self._compiled_lock = threading.Lock()
+        self.batches = 0
+        self.rows = 0
+        worker = threading.Thread(target=self._run, name=f"{name}-batcher", daemon=True)
+        worker.start()
+
+    def predict(self, features, timeout=None):
+        if self.get_serving()[0] is None:
+            raise ValueError(f"{self.name} model not trained")
+        inputs = np.asarray(features, dtype=np.float32)
+        # Only buffers converted here may be scaled in place; the caller's are copied first
+        owned = inputs is not features and inputs.base is None
+        if inputs.shape == self.input_shape:
+            inputs = inputs[np.newaxis]
+        if inputs.shape[1:] != self.input_shape:
+            raise ValueError(f"Expected features of shape (n, {', '.join(map(str, self.input_shape))}), got {inputs.shape}")
+        future = Future()
+        self._queue.put((inputs, owned, future))
+        return future.result(timeout)
+
+    def _compiled(self, model):
+        # prepare() runs on the publishing thread while the worker is serving
+        with self._compiled_lock:
+            entry = self._compiled_cache.get(id(model))
+            if entry is None or entry[0] is not model:
+                forward = tf.function(
+                    lambda inputs: model(inputs, training=False),
+                    input_signature=[tf.TensorSpec([None, *self.input_shape], tf.float32)]
+                )
+                entry = self._compiled_cache[id(model)] = (model, forward)
+                # Keep the newest model and the one it replaces
+                while len(self._compiled_cache) > 2:
+                    del self._compiled_cache[next(iter(self._compiled_cache))]
+            return entry[1]
+
+    def prepare(self, model):
+        # Trace a new model before it is published so requests never pay for it
+        self._compiled(model)(np.zeros((1, *self.input_shape), dtype=np.float32))
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            rows = len(batch[0][0])
+            deadline = time.monotonic() + self.max_wait
+            while rows < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+                rows += len(batch[-1][0])
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        try:
+            model, scaler = self.get_serving()
+            if model is None:
+                raise ValueError(f"{self.name} model not trained")
+            forward = self._compiled(model)
+            if len(batch) > 1:
+                inputs = np.concatenate([rows for rows, _, _ in batch])
+            else:
+                inputs, owned, _ = batch[0]
+                if scaler is not None and not (owned and inputs.flags.c_contiguous):
+                    inputs = np.array(inputs, order='C')
+            if scaler is not None:
+                scaler.transform_(inputs)
+            outputs = forward(inputs).numpy()
+        except Exception as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.rows += len(inputs)
+        splits = np.cumsum([len(rows) for rows, _, _ in batch])[:-1]
+        for (_, _, future), output in zip(batch, np.split(outputs, splits)):
+            future.set_result(output)
+
+class ArtifactStore:
+    """Local, versioned store for model weights, scalers and other arrays.
+
+    Each version lives in ``<root>/<name>/<version>/``. It holds one joblib
+    file per object and a ``manifest.json`` with their sha256 checksums and
+    sizes. A version is written to a temporary directory and renamed into
+    place, then ``CURRENT`` is swapped atomically, so readers only ever see
+    complete versions. Loads memory-map the arrays (``mmap_mode='r'``), so a
+    restart is a warm load instead of a retrain. Keras ``set_weights`` copies
+    the weights into the model's own variables; only arrays served as-is,
+    such as segment centroids and scalers, stay shared between processes.
+    """
+
+    def __init__(self, root, keep=5):
+        self.root = root
+        self.keep = max(1, int(keep))
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def _sha256(path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as handle:
+            for block in iter(lambda: handle.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def versions(self, name):
+        directory = os.path.join(self.root, name)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(int(entry) for entry in os.listdir(directory) if entry.isdigit())
+
+    def current(self, name):
+        try:
+            with open(os.path.join(self.root, name, 'CURRENT')) as handle:
+                return int(handle.read().strip())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def save(self, name, objects, metadata=None):
+        directory = os.path.join(self.root, name)
+        os.makedirs(directory, exist_ok=True)
+        staging = os.path.join(directory, f'.tmp-{uuid.uuid4().hex}')
+        os.makedirs(staging)
+        try:
+            files = {}
+            for key, value in objects.items():
+                filename = f'{key}.joblib'
+                path = os.path.join(staging, filename)
+                joblib.dump(value, path)
+                files[key] = {'file': filename, 'sha256': self._sha256(path), 'bytes': os.path.getsize(path)}
+
+            version = max(self.versions(name), default=0) + 1
+            manifest = {
+                'name': name,
+                'version': version,
+                'created_at': datetime.now().isoformat(),
+                'files': files,
+                'metadata': metadata or {}
+            }
+            with open(os.path.join(staging, 'manifest.json'), 'w') as handle:
+                json.dump(manifest, handle, indent=2)
+            os.rename(staging, os.path.join(directory, str(version)))
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        pointer = os.path.join(directory, f'.CURRENT-{uuid.uuid4().hex}')
+        with open(pointer, 'w') as handle:
+            handle.write(str(version))
+        os.replace(pointer, os.path.join(directory, 'CURRENT'))
+        self._prune(name, version)
+        return version
+
+    def candidates(self, name):
+        """Versions to try on startup: the current one, then older ones newest first."""
+        current = self.current(name)
+        older = [version for version in reversed(self.versions(name)) if current is None or version < current]
+        return ([current] if current is not None else []) + older
+
+    def load(self, name, version=None, verify=False):
+        """Return ``(objects, manifest)`` for ``version`` (default: current), or ``None``."""
+        version = version if version is not None else self.current(name)
+        if version is None:
+            return None
+        directory = os.path.join(self.root, name, str(version))
+        with open(os.path.join(directory, 'manifest.json')) as handle:
+            manifest = json.load(handle)
+
+        objects = {}
+        for key, entry in manifest['files'].items():
+            path = os.path.join(directory, entry['file'])
+            if os.path.getsize(path) != entry['bytes'] or (verify and self._sha256(path) != entry['sha256']):
+                raise ValueError(f"Artifact {name} v{version} is corrupt: {entry['file']} does not match its manifest")
+            objects[key] = joblib.load(path, mmap_mode='r')
+        return objects, manifest
+
+    def _prune(self, name, current):
+        for version in self.versions(name)[:-self.keep]:
+            if version != current:
+                shutil.rmtree(os.path.join(self.root, name, str(version)), ignore_errors=True)
+
+class TrainingScheduler:
+    """Runs training jobs in a process pool and publishes the results.
+
+    Every request gets a job id whose status can be polled. While a job for
+    a model type is still waiting, new requests for that type join it
+    instead of queueing another run, and the newest data wins. Each model
+    type trains one job at a time. Jobs run in spawned processes, so
+    training never holds the serving process's GIL. Each job gets
+    ``scaler_for(model_type)`` when it starts, and the artifact it returns
+    goes to ``publish(model_type, artifact)``.
+    """
+
+    def __init__(self, publish, max_workers=1, history=1000, scaler_for=None):
+        self.publish = publish
+        self.scaler_for = scaler_for or (lambda model_type: None)
+        self.max_workers = max(1, int(max_workers))
+        self._executor = None
+        # Re-entrant: a future that fails immediately runs its callback inside _start
+        self._lock = threading.RLock()
+        self._jobs = {}
+        self._history = deque()
+        self._history_size = max(1, int(history))
+        self._pending = {}
+        self._running = {}
+
+    def submit(self, model_type, data):
+        with self._lock:
+            job = self._pending.get(model_type)
+            if job is not None:
+                job['data'] = data
+                job['requests'] += 1
+                return self._public(job)
+
+            job = {
+                'id': uuid.uuid4().hex,
+                'model_type': model_type,
+                'status': 'queued',
+                'requests': 1,
+                'submitted_at': datetime.now().isoformat(),
+                'started_at': None,
+                'finished_at': None,
+                'version': None,
+                'error': None,
+                'data': data
+            }
+            self._remember(job)
+            if model_type in self._running:
+                self._pending[model_type] = job
+            else:
+                self._start(job)
+            return self._public(job)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return self._public(job) if job is not None else None
+
+    def _remember(self, job):
+        self._jobs[job['id']] = job
+        self._history.append(job['id'])
+        while len(self._history) > self._history_size:
+            oldest = self._jobs.get(self._history[0])
+            if oldest is not None and oldest['status'] in ('queued', 'running'):
+                break
+            self._jobs.pop(self._history.popleft(), None)
+
+    def _new_executor(self):
+        return ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn'))
+
+    def _start(self, job):
+        # Called with the lock held
+        job['status'] = 'running'
+        job['started_at'] = datetime.now().isoformat()
+        self._running[job['model_type']] = job
+        data, job['data'] = job['data'], None
+        try:
+            # Taken at start, so a queued job builds on the scaler its predecessor published
+            args = (train_model, job['model_type'], data, self.scaler_for(job['model_type']))
+            if self._executor is None:
+                self._executor = self._new_executor()
+            try:
+                future = self._executor.submit(*args)
+            except BrokenProcessPool:
+                # A crashed training process breaks the whole pool; start a new one
+                self._executor = self._new_executor()
+                future = self._executor.submit(*args)
+        except Exception as e:
+            job.update(status='failed', error=str(e), finished_at=datetime.now().isoformat())
+            del self._running[job['model_type']]
+            return
+        future.add_done_callback(lambda done: self._finish(job, done))
+
+    def _finish(self, job, future):
+        try:
+            version = self.publish(job['model_type'], future.result())
+            update = {'status': 'succeeded', 'version': version}
+        except Exception as e:
+            update = {'status': 'failed', 'error': str(e)}
+            print(f"Training error: {e}")
+        with self._lock:
+            job.update(update, finished_at=datetime.now().isoformat())
+            del self._running[job['model_type']]
+            pending = self._pending.pop(job['model_type'], None)
+            if pending is not None:
+                self._start(pending)
+
+    @staticmethod
+    def _public(job):
+        return {key: value for key, value in job.items() if key != 'data'}
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
 class EnterpriseAI:
     def __init__(self):
         self.models = {
             'supply_chain': None,
             'customer_intelligence': None,
+            'customer_segments': None,
             'demand_forecast': None,
             'risk_assessment': None
         }
+        self.model_versions = {model_type: 0 for model_type in self.models}
         self.scalers = {}
-        self.training_queue = queue.Queue()
-        self._start_training_worker()
+        # (model, scaler) pairs the predictors serve, swapped as one entry
+        self.serving = {}
+        self._publish_lock = threading.Lock()
+        self.store = ArtifactStore(
+            os.getenv('MODEL_STORE_DIR', os.path.join('data', 'model_store')),
+            keep=int(os.getenv('MODEL_STORE_KEEP', '5'))
+        )
+        # Startup loads re-hash every file by default; a bad version is skipped
+        self.verify_artifacts = os.getenv('MODEL_STORE_VERIFY', '1') == '1'
+        self.training = TrainingScheduler(
+            self.publish_model,
+            max_workers=int(os.getenv('TRAINING_WORKERS', '1')),
+            scaler_for=lambda model_type: self.scalers.get(model_type)
+        )
+        max_batch_size = int(os.getenv('PREDICT_MAX_BATCH_SIZE', '64'))
+        max_wait_ms = float(os.getenv('PREDICT_MAX_WAIT_MS', '5'))
+        self.predictors = {
+            'supply_chain': BatchingPredictor(
+                'Supply chain', lambda: self.serving.get('supply_chain', (None, None)),
+                (30, 10), max_batch_size, max_wait_ms
+            ),
+            'customer_intelligence': BatchingPredictor(
+                'Customer intelligence', lambda: self.serving.get('customer_intelligence', (None, None)),
+                (20,), max_batch_size, max_wait_ms
+            ),
+            'demand_forecast': BatchingPredictor(
+                'Demand forecast', lambda: self.serving.get('demand_forecast', (None, None)),
+                (DEMAND_LOOKBACK,), max_batch_size, max_wait_ms
+            )
+        }
+        self.max_forecast_horizon = int(os.getenv('DEMAND_MAX_HORIZON', '90'))
+        self._load_artifacts()
 
-    def _start_training_worker(self):
-        worker = threading.Thread(target=self._process_training_queue, daemon=True)
-        worker.start()
+    def _load_artifacts(self):
+        # Warm start from the newest stored version of every model that loads
+        # cleanly, falling back to older versions if CURRENT is corrupt
+        for model_type in MODEL_BUILDERS:
+            for version in self.store.candidates(model_type):
+                try:
+                    artifact, manifest = self.store.load(model_type, version, verify=self.verify_artifacts)
+                    self._install_model(model_type, artifact, manifest['version'])
+                    print(f"Loaded {model_type} v{manifest['version']} from {self.store.root}")
+                    break
+                except Exception as e:
+                    print(f"Error loading stored {model_type} model v{version}: {e}")
 
-    def _process_training_queue(self):
-        while True:
-            try:
-                task = self.training_queue.get()
-                model_type = task['type']
-                data = task['data']
-                
-                if model_type == 'supply_chain':
-                    self._train_supply_chain_model(data)
-                elif model_type == 'customer_intelligence':
-                    self._train_customer_intelligence_model(data)
-                elif model_type == 'demand_forecast':
-                    self._train_demand_forecast_model(data)
-                
-                self.training_queue.task_done()
-            except Exception as e:
-                print(f"Training error: {e}")
-            time.sleep(1)
-
-    def _train_supply_chain_model(self, data):
-        model = Sequential([
-            LSTM(64, return_sequences=True, input_shape=(30, 10)),
-            LSTM(32),
-            Dense(16, activation='relu'),
-            Dense(1)
-        ])
-        model.compile(optimizer='adam', loss='mse')
-        self.models['supply_chain'] = model
-
-    def _train_customer_intelligence_model(self, data):
-        model = Sequential([
-            Dense(64, activation='relu', input_shape=(20,)),
-            Dense(32, activation='relu'),
-            Dense(16, activation='relu'),
-            Dense(8, activation='softmax')
-        ])
-        model.compile(optimizer='adam', loss='categorical_crossentropy')
-        self.models['customer_intelligence'] = model
+    def _install_model(self, model_type, artifact, version):
+        model = MODEL_BUILDERS[model_type]()
+        model.set_weights(artifact['weights'])
+        scaler = artifact.get('scaler')
+        if model_type in SCALED_MODELS and scaler is None:
+            raise ValueError(f"{model_type} artifact v{version} has no scaler")
+        if model_type in self.predictors:
+            self.predictors[model_type].prepare(model)
+        with self._publish_lock:
+            # Readers always see complete dicts: they are replaced, never mutated
+            self.serving = {**self.serving, model_type: (model, scaler)}
+            self.models = {**self.models, model_type: model}
+            self.model_versions = {**self.model_versions, model_type: version}
+            if scaler is not None:
+                self.scalers = {**self.scalers, model_type: scaler}
+
+    def publish_model(self, model_type, artifact):
+        """Persist a trained artifact (weights and scaler) as a new version and swap the model in."""
+        version = self.store.save(model_type, artifact, metadata={'model_type': model_type})
+        self._install_model(model_type, artifact, version)
+        return version
 
     def predict_supply_chain(self, data):
-        if self.models['supply_chain'] is None:
-            raise ValueError("Supply chain model not trained")
-        return self.models['supply_chain'].predict(data)
+        return self.predictors['supply_chain'].predict(data)
 
     def analyze_customer_behavior(self, data):
-        if self.models['customer_intelligence'] is None:
-            raise ValueError("Customer intelligence model not trained")
-        return self.models['customer_intelligence'].predict(data)
+        return self.predictors['customer_intelligence'].predict(data)
+
+    def forecast_demand(self, series, horizon=1):
+        """Forecast ``horizon`` periods for every series of a ``(n_series, periods)`` panel.
+
+        Each step runs all series through the model in one call and feeds the
+        forecasts back in as the newest period.
+        """
+        if not 1 <= horizon <= self.max_forecast_horizon:
+            raise ValueError(f"Horizon must be between 1 and {self.max_forecast_horizon}")
+        window = demand_panel(series)[:, -DEMAND_LOOKBACK:]
+        forecast = np.empty((len(window), horizon), dtype=np.float32)
+        for step in range(horizon):
+            scaled, level = normalize_windows(window)
+            forecast[:, step] = self.predictors['demand_forecast'].predict(scaled)[:, 0] * level[:, 0]
+            if step + 1 < horizon:
+                window = np.concatenate([window[:, 1:], forecast[:, step:step + 1]], axis=1)
+        return forecast
+
+    def segment_customers(self, features, return_distance=False):
+        segmenter = self.models['customer_segments']
+        if segmenter is None:
+            raise ValueError("Customer segments not fitted")
+        return segmenter.assign(features, return_distance)
+
+# Spawned training workers re-import this file as __mp_main__ when it is run
+# as a script; they only need model_training, not a second engine
+if __name__ != '__mp_main__':
+    ai_engine = EnterpriseAI()
+
+NPY_TYPE = 'application/x-npy'
+RAW_TYPE = 'application/octet-stream'
+NPZ_TYPE = 'application/x-npz'
 
-ai_engine = EnterpriseAI()
+def request_array():
+    """The request body as an array if it was sent as ``.npy`` or raw bytes, else ``None``.
+
+    Raw ``application/octet-stream`` bodies describe themselves with
+    ``X-Array-Dtype`` (default ``float32``) and ``X-Array-Shape`` headers.
+    Either way the array is a read-only ``np.frombuffer`` view of the body.
+    """
+    if request.mimetype not in (NPY_TYPE, RAW_TYPE):
+        return None
+    body = request.get_data(cache=False)
+    if request.mimetype == NPY_TYPE:
+        header = io.BytesIO(body)
+        version = np.lib.format.read_magic(header)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(header)
+        elif version == (2, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(header)
+        else:
+            raise ValueError(f"Unsupported .npy format version {version}")
+        offset = header.tell()
+    else:
+        if 'X-Array-Shape' not in request.headers:
+            raise ValueError("X-Array-Shape header is required for application/octet-stream bodies")
+        shape = tuple(int(size) for size in request.headers['X-Array-Shape'].split(','))
+        try:
+            dtype = np.dtype(request.headers.get('X-Array-Dtype', 'float32'))
+        except TypeError as e:
+            # Unknown type names raise TypeError; report them like any other bad body
+            raise ValueError(f"Invalid X-Array-Dtype header: {e}") from e
+        fortran_order, offset = False, 0
+
+    if dtype.kind not in 'biuf':
+        raise ValueError(f"Unsupported array dtype {dtype}")
+    count = int(np.prod(shape))
+    if len(body) - offset != count * dtype.itemsize:
+        raise ValueError(f"Body has {len(body) - offset} bytes of data, expected {count * dtype.itemsize} for {dtype} {shape}")
+    array = np.frombuffer(body, dtype=dtype, count=count, offset=offset)
+    return array.reshape(shape, order='F' if fortran_order else 'C')
+
+def request_arrays():
+    """Named arrays of an ``application/x-npz`` body, else ``None``."""
+    if request.mimetype != NPZ_TYPE:
+        return None
+    try:
+        loaded = np.load(io.BytesIO(request.get_data(cache=False)), allow_pickle=False)
+        # A bare .npy body loads as an array, not an archive
+        if not isinstance(loaded, np.lib.npyio.NpzFile):
+            raise ValueError("Invalid .npz body: expected a zip archive of arrays")
+        with loaded as archive:
+            return {name: archive[name] for name in archive.files}
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"Invalid .npz body: {e}") from e
+
+def array_response(array, payload):
+    """``payload()`` as JSON, or ``array`` alone if the client prefers ``.npy`` or raw bytes."""
+    best = request.accept_mimetypes.best_match(['application/json', NPY_TYPE, RAW_TYPE])
+    if best == NPY_TYPE:
+        buffer = io.BytesIO()
+        np.save(buffer, array, allow_pickle=False)
+        response = Response(buffer.getvalue(), mimetype=NPY_TYPE)
+    elif best == RAW_TYPE:
+        array = np.ascontiguousarray(array)
+        response = Response(array.tobytes(), mimetype=RAW_TYPE)
+        response.headers['X-Array-Dtype'] = array.dtype.str
+        response.headers['X-Array-Shape'] = ','.join(map(str, array.shape))
+    else:
+        response = jsonify(payload())
+    response.headers['Vary'] = 'Accept'
+    return response
 
 @app.route('/api/supply-chain/optimize', methods=['POST'])
 def optimize_supply_chain():
     try:
-        data = request.json
-        result = ai_engine.predict_supply_chain(np.array(data['features']))
-        return jsonify({
+        features = request_array()
+        result = ai_engine.predict_supply_chain(features if features is not None else request.json['features'])
+        return array_response(result, lambda: {
             'optimization_result': result.tolist(),
             'recommendations': [
                 {'action': 'Optimize inventory levels', 'impact': 0.85},
@@ -97,33 +549,146 @@ def optimize_supply_chain():
                 {'action': 'Update supplier agreements', 'impact': 0.68}
             ]
         })
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/customer/analyze', methods=['POST'])
 def analyze_customer():
+    try:
+        features = request_array()
+        result = ai_engine.analyze_customer_behavior(features if features is not None else request.json['features'])
+
+        def payload():
+            # Segment probabilities averaged over the customers in the request
+            scores = result.mean(axis=0)
+            return {
+                'segments': result.tolist(),
+                'insights': [
+                    {'category': 'Behavior', 'score': float(scores[0])},
+                    {'category': 'Loyalty', 'score': float(scores[1])},
+                    {'category': 'Value', 'score': float(scores[2])}
+                ]
+            }
+        return array_response(result, payload)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/customer/segments', methods=['GET'])
+def customer_segments():
+    segmenter = ai_engine.models['customer_segments']
+    if segmenter is None:
+        return jsonify({'error': 'Customer segments not fitted'}), 404
+    return jsonify({
+        'version': ai_engine.model_versions['customer_segments'],
+        'segments': segmenter.n_segments,
+        'features': int(segmenter.centroids.shape[1]),
+        'centroids': segmenter.centroids.tolist()
+    })
+
+@app.route('/api/customer/segments/fit', methods=['POST'])
+def fit_customer_segments():
     try:
         data = request.json
-        result = ai_engine.analyze_customer_behavior(np.array(data['features']))
-        return jsonify({
-            'segments': result.tolist(),
-            'insights': [
-                {'category': 'Behavior', 'score': float(result[0])},
-                {'category': 'Loyalty', 'score': float(result[1])},
-                {'category': 'Value', 'score': float(result[2])}
-            ]
-        })
+        if data.get('path'):
+            resolve_data_path(data['path'])
+        elif not data.get('features'):
+            return jsonify({'error': 'Provide a feature file path or features'}), 400
+        job = ai_engine.training.submit('customer_segments', data)
+        return jsonify({'message': 'Segmentation queued', 'job': job}), 202
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/train', methods=['POST'])
-def train_model():
+@app.route('/api/customer/segments/assign', methods=['POST'])
+def assign_customer_segments():
     try:
+        features = request_array()
+        if features is not None:
+            labels = ai_engine.segment_customers(features)
+            return array_response(labels, lambda: {'segments': labels.tolist()})
+
         data = request.json
-        ai_engine.training_queue.put(data)
-        return jsonify({'message': f'Training queued for {data["type"]}'})
+        if data.get('path'):
+            # Large batches are scored from a memory-mapped file and written next to it
+            path = resolve_data_path(data['path'])
+            if not path.endswith('.npy'):
+                return jsonify({'error': 'Batch assignment needs a .npy feature file'}), 400
+            labels = ai_engine.segment_customers(np.load(path, mmap_mode='r'))
+            output = resolve_data_path(data.get('output') or data['path'][:-4] + '.segments.npy')
+            np.save(output, labels)
+            return jsonify({
+                'customers': len(labels),
+                'output': os.path.relpath(output, os.path.realpath(CUSTOMER_DATA_DIR)),
+                'counts': np.bincount(labels, minlength=ai_engine.models['customer_segments'].n_segments).tolist()
+            })
+
+        labels, distances = ai_engine.segment_customers(data['features'], return_distance=True)
+        return jsonify({'segments': labels.tolist(), 'distances': distances.tolist()})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/ml/demand-prediction', methods=['POST'])
+def predict_demand():
+    try:
+        series = request_array()
+        data = request.args if series is not None else request.json
+        horizon = int(data.get('horizon', 1))
+        if series is None:
+            series = data.get('series')
+        if series is not None:
+            forecast = ai_engine.forecast_demand(series, horizon)
+            return array_response(forecast, lambda: {
+                'forecast': np.round(forecast.astype(np.float64), 4).tolist(),
+                'horizon': horizon,
+                'model_version': ai_engine.model_versions['demand_forecast']
+            })
+
+        forecast = ai_engine.forecast_demand([data['features']], horizon)
+        result = {'predicted_demand': float(forecast[0, 0])}
+        if horizon > 1:
+            result['forecast'] = np.round(forecast[0].astype(np.float64), 4).tolist()
+        return jsonify(result)
+    except (KeyError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/train', methods=['POST'])
+@app.route('/api/ml/train', methods=['POST'])
+def train():
+    try:
+        arrays = request_arrays()
+        if arrays is None and request.mimetype in (NPY_TYPE, RAW_TYPE):
+            arrays = {'features': request_array()}
+        if arrays is not None:
+            # Binary bodies carry only arrays; the type and options are query parameters
+            options = request.args.to_dict()
+            data = {'type': options.pop('type', None), 'data': {**options, **arrays}}
+        else:
+            data = request.json
+        if data.get('type') not in MODEL_BUILDERS:
+            return jsonify({'error': f'Unknown model type: {data.get("type")}'}), 400
+        job = ai_engine.training.submit(data['type'], data.get('data'))
+        return jsonify({'message': f'Training queued for {data["type"]}', 'job': job}), 202
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/train/<job_id>', methods=['GET'])
+def training_status(job_id):
+    job = ai_engine.training.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown training job'}), 404
+    return jsonify({'job': job, 'model_version': ai_engine.model_versions.get(job['model_type'])})
+
 if __name__ == '__main__':
-    app.run(port=5000)
\ No newline at end of file
+    # Concurrent requests are what lets the predictors fill their batches
+    app.run(port=5000, threaded=True)
\ No newline at end of file
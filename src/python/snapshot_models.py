@@ -0,0 +1,28 @@
+"""Pre-download the AI engine's models for offline starts.
+
+    python snapshot_models.py --cache-dir /models
+
+Then run the engine with MODEL_CACHE_DIR=/models AI_ENGINE_OFFLINE=1 and it
+loads every model from disk without touching the network.
+"""
+import argparse
+import os
+
+from model_config import configured_models, snapshot_models
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cache-dir", default=os.getenv("MODEL_CACHE_DIR") or "models",
+                        help="Directory to write model snapshots into")
+    parser.add_argument("models", nargs="*",
+                        help="Model names to snapshot (defaults to the engine's configured models)")
+    args = parser.parse_args()
+
+    model_names = args.models or list(dict.fromkeys(configured_models().values()))
+    for model_name, path in snapshot_models(model_names, args.cache_dir).items():
+        print(f"{model_name} -> {path}")
+
+
+if __name__ == "__main__":
+    main()
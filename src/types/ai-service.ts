@@ -51,4 +51,5 @@ export interface AnalysisResponse {
   };
   metrics: Record<string, any>;
   confidence?: number;
+  results?: Record<string, any>[];
 }
\ No newline at end of file